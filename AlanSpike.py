@@ -11,6 +11,7 @@ class ConfigAlanSpike(Config):
         self.TURN_SPEED_MIN = const(30)
         self.TURN_SPEED_MAX = const(600)
         self.TURN_CORRECTION_SPEED = const(20)
+        self.LINE_SETPOINT = const(60)
 
         self.gyro = Gyro(self.hub) # Gets the gyro as an object
 
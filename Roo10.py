@@ -10,6 +10,7 @@ class Roo10(Config):
         self.TURN_SPEED_MIN = const(40)
         self.TURN_SPEED_MAX = const(600)
         self.TURN_CORRECTION_SPEED = const(5)
+        self.LINE_SETPOINT = const(60)
 
         self.curr = 0
 
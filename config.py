@@ -60,6 +60,7 @@ class Config:
         config.hub.display.text("S?")
         buttons = config.hub.buttons.pressed()
         while len(buttons) == 0:
+            wait(20)
             buttons = config.hub.buttons.pressed()
 
         if Button.BLUETOOTH in buttons:
@@ -85,6 +86,7 @@ class Config:
 
         buttons = config.hub.buttons.pressed()
         while len(buttons) == 0:
+            wait(20)
             buttons = config.hub.buttons.pressed()
 
         if Button.BLUETOOTH in buttons:
@@ -104,7 +106,7 @@ class Config:
         config.drive.drive.drive(100, 0)
         wait(200)
         while (len(config.hub.buttons.pressed()) == 0):
-            pass
+            wait(20)
         config.drive.drive.stop()
 
     def reset(self, config):
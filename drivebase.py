@@ -7,6 +7,8 @@ from gyro import Gyro
 from other import coroutine
 from lightSensor import LightSensor
 
+_INV_2PI = 1.0 / (umath.pi * 2)
+
 
 class Drivebase:
     """
@@ -29,6 +31,15 @@ class Drivebase:
 
         self.drive = DriveBase(self.leftMotor, self.rightMotor,
                                self.wheelDiameter, self.axleTrack)
+        self._drive_drive = self.drive.drive
+        self._drive_distance = self.drive.distance
+        self._drive_reset = self.drive.reset
+        self._drive_stop = self.drive.stop
+
+        # Shared free-running timer, motions compare against their own start time
+        # so simultaneous movements don't reset each other
+        self._timer = StopWatch()
+        self.SPEED_MAX_IDX = config.SPEED_LIST_COUNT - 1
         self.SPEEDLIST = [self.getSpeed(dist)
                           for dist in range(0, config.SPEED_LIST_COUNT)]
 
@@ -54,7 +65,7 @@ class Drivebase:
         return max(min(input, bound[1]), bound[0])
 
     def stop(self):
-        self.drive.stop()
+        self._drive_stop()
 
     def turnSpeed(self, angle):
         turn_speed = angle / 180 * (self.config.TURN_SPEED_MAX - self.config.TURN_SPEED_MIN) +\
@@ -64,30 +75,42 @@ class Drivebase:
     def turnAngle(self, heading):
         return (heading - self.getHead() + 180) % 360 - 180
 
-    @coroutine
-    def turnTo(self, heading, tolerance=1, timeout=4000):
+    def _turnAngleRaw(self, heading):
+        # Same as turnAngle, the getHead normalisation cancels out under the outer modulo
+        return (heading - self.gyro.heading() + 180) % 360 - 180
+
+    def _turnTo(self, heading, tolerance=1, timeout=4000):
         """
         Turns the robot on the spot to a given heading
+
+        Undecorated generator so other movements can drive it inline
         """
-        def _turnTo():
-            angle = self.turnAngle(heading)
-            runTime = StopWatch()
-            while round(angle) not in range(-tolerance, tolerance) and runTime.time() < timeout:
-                self.drive.drive(0, self.turnSpeed(angle))
-                angle = self.turnAngle(heading)
-                yield True
-            self.stop()
-            yield False
-        return _turnTo
+        turnAngle = self._turnAngleRaw
+        angle = turnAngle(heading)
+        clock = self._timer.time
+        end = clock() + timeout
+        while abs(angle) >= tolerance and clock() < end:
+            self._drive_drive(0, self.turnSpeed(angle))
+            angle = turnAngle(heading)
+            yield True
+        self.stop()
+        yield False
+
+    turnTo = coroutine(_turnTo)
 
     def rampSpeed(self, distance, curr_distance, speedLimit):
         if curr_distance > distance / 2:
-            delta_distance = round(abs(distance - curr_distance))
+            delta_distance = round(distance - curr_distance)
         else:
-            delta_distance = round(abs(curr_distance))
-        speed = self.SPEEDLIST[min(
-            delta_distance, self.config.SPEED_LIST_COUNT-1)]
-        return self.sign(speedLimit) * min(speed, abs(speedLimit))
+            delta_distance = round(curr_distance)
+        if delta_distance < 0:
+            delta_distance = -delta_distance
+        max_idx = self.SPEED_MAX_IDX
+        delta_distance = delta_distance if delta_distance < max_idx else max_idx
+        speed = self.SPEEDLIST[delta_distance]
+        lim = speedLimit if speedLimit >= 0 else -speedLimit
+        speed = speed if speed < lim else lim
+        return speed if speedLimit >= 0 else -speed
 
     @coroutine
     def moveDist(self, distance, speed=500, heading=None, turn=True, up=True, down=True, timeout=None):
@@ -97,56 +120,64 @@ class Drivebase:
         Ramp up and down can be controlled by up and down flags
         """
 
-        def _moveDist():
-            posDistance = abs(distance)
-            if speed < 0:
-                print("Error Negative speed", speed)
-                return
-            
-            if heading is None:
-                head = self.getHead()
-            else:
-                head = heading
-                if turn and abs(self.turnAngle(head)) > 5:
-                    self.turnTo(head)
-
-            rampSpeed_max = self.rampSpeed(posDistance, posDistance/2, speed)
-            if timeout is None:
-                # * 2000 to double time and convert to milliseconds
-                time = (posDistance / rampSpeed_max) * 2 * 1000 + 500
-            else:
-                time = timeout
-            # logData = []
-
-            self.drive.reset()
-            timer = StopWatch()
-            while timer.time() < time:
-                # print(runState.getStopFlag(), runButton.pressed())
-                curr_distance = abs(self.drive.distance())
-                if curr_distance >= posDistance:
-                    break
-                if up == False and curr_distance < posDistance/2:
-                    drive_speed = speed
-                elif down == False and curr_distance > posDistance/2:
-                    drive_speed = speed
-                else:
-                    drive_speed = self.rampSpeed(posDistance, curr_distance, speed)
-
-                self.drive.drive(drive_speed*self.sign(distance),
-                                self.turnAngle(head) * self.config.TURN_CORRECTION_SPEED)
-
-                yield True
-                # print("Speed, drive_speed, distance: ", speed, drive_speed, \
-                #        curr_distance)
-                # logData.append([drive_speed, curr_distance])
-            # print("MoveDist timeout=", timeout, "ms")
-            self.stop()
+        posDistance = abs(distance)
+        if speed < 0:
+            print("Error Negative speed", speed)
             yield False
+            return
+
+        if heading is None:
+            head = self.getHead()
+        else:
+            head = heading
+            if turn and abs(self.turnAngle(head)) > 5:
+                turning = self._turnTo(head)
+                while next(turning):
+                    yield True
+
+        rampSpeed_max = self.rampSpeed(posDistance, posDistance/2, speed)
+        if timeout is None:
+            # * 2000 to double time and convert to milliseconds
+            time = (posDistance / rampSpeed_max) * 2 * 1000 + 500
+        else:
+            time = timeout
+        # logData = []
+
+        drive_fn = self._drive_drive
+        dist_fn = self._drive_distance
+        turnAngle = self._turnAngleRaw
+        rampSpeed = self.rampSpeed
+        tcs = self.config.TURN_CORRECTION_SPEED
+        sgn = 1 if distance >= 0 else -1
+        half = posDistance / 2
+
+        self._drive_reset()
+        clock = self._timer.time
+        end = clock() + time
+        while clock() < end:
+            # print(runState.getStopFlag(), runButton.pressed())
+            curr_distance = abs(dist_fn())
+            if curr_distance >= posDistance:
+                break
+            if up == False and curr_distance < half:
+                drive_speed = speed
+            elif down == False and curr_distance > half:
+                drive_speed = speed
+            else:
+                drive_speed = rampSpeed(posDistance, curr_distance, speed)
+
+            drive_fn(drive_speed*sgn, turnAngle(head) * tcs)
 
-        return _moveDist
+            yield True
+            # print("Speed, drive_speed, distance: ", speed, drive_speed, \
+            #        curr_distance)
+            # logData.append([drive_speed, curr_distance])
+        # print("MoveDist timeout=", timeout, "ms")
+        self.stop()
+        yield False
 
     @coroutine
-    def lineFollower(self, distance: int, sensor: LightSensor, speed=250, side=1, kp=1.2, ki=0, kd=10):
+    def lineFollower(self, distance: int, sensor: LightSensor, speed=250, side=1, kp=1.2, ki=0, kd=10, a=0, b_frac=1.0):
         """
         Follows a line for a certain distance
 
@@ -155,34 +186,49 @@ class Drivebase:
         side is either 1 or -1, controls which side of the line it will follow
 
         PID constants can be tweaked through kp, ki, kd.
-        """
-        def _lineFollower():
-            self.drive.reset()
+        Uses the incremental PID form, so only the last two errors are kept.
 
-            lastError = 0
-            integral = 0
+        Forward speed is scaled by b_frac - a*|error|/max_error (never below 0.3)
+        so the robot slows down when it is far off the line. Off by default (a=0).
+        max_error is the largest possible error for the setpoint. b_frac above 1
+        lets the robot go faster than speed while it is on the line.
+        """
+        drive_fn = self._drive_drive
+        dist_fn = self._drive_distance
+        rampSpeed = self.rampSpeed
+        sensor_read = sensor.readLight
+        setpoint = getattr(self.config, 'LINE_SETPOINT', 60)
+        slowdown = a / max(setpoint, 100 - setpoint) # readLight is 0 - 100
 
-            curr_distance = abs(self.drive.distance())
-            while curr_distance < distance:
-                error = 60 - sensor.readLight()
+        self._drive_reset()
 
-                derivative = error - lastError
-                lastError = error
-                integral = (integral / 2) + error
+        # Incremental (velocity form) PID state
+        e_prev = 0
+        e_prev2 = 0
+        turnRate = 0
 
-                turnRate = (error * kp) + (derivative * kd) + (integral * ki)
+        while True:
+            curr_distance = abs(dist_fn())
+            if curr_distance >= distance:
+                break
+            error = setpoint - sensor_read()
 
-                ramp_speed = self.rampSpeed(distance, curr_distance, speed)
+            turnRate += kp * (error - e_prev) + ki * error + \
+                kd * (error - 2 * e_prev + e_prev2)
+            e_prev2 = e_prev
+            e_prev = error
 
-                self.drive.drive(ramp_speed, turnRate * side)
+            ramp_speed = rampSpeed(distance, curr_distance, speed)
 
-                curr_distance = abs(self.drive.distance())
+            scale = b_frac - slowdown * (error if error >= 0 else -error)
+            if scale < 0.3:
+                scale = 0.3
 
-                yield True
-            self.stop()
-            yield False
+            drive_fn(ramp_speed * scale, turnRate * side)
 
-        return _lineFollower
+            yield True
+        self.stop()
+        yield False
 
     @coroutine
     def moveArc(self, radius, heading, speed=100, timeout=10000):
@@ -191,15 +237,14 @@ class Drivebase:
 
         sign of radius controls turning to left or right
         """
-        def _moveArc():
-            turn_rate = (360 * speed) / (umath.pi * 2 * radius)
-            tolerance = int(2 * abs(speed) / 100)
-
-            runTime = StopWatch()
-            self.drive.drive(speed, turn_rate)
-            while round(self.turnAngle(heading)) not in range(-tolerance, tolerance) and runTime.time() < timeout:
-                yield True
-            self.stop()
-            yield False
-        
-        return _moveArc
+        turn_rate = 360.0 * speed * _INV_2PI / radius
+        tolerance = int(2 * abs(speed) / 100)
+
+        turnAngle = self._turnAngleRaw
+        clock = self._timer.time
+        end = clock() + timeout
+        self._drive_drive(speed, turn_rate)
+        while abs(turnAngle(heading)) >= tolerance and clock() < end:
+            yield True
+        self.stop()
+        yield False
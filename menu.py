@@ -1,10 +1,9 @@
 from pybricks.parameters import Button, Color
 from pybricks.tools import wait, StopWatch
 
-import umath
 import uselect
 import usys
-from other import isGen
+from other import Task
 from button import Buttons
 from config import Config
 
@@ -16,7 +15,7 @@ class menu:
         self.hub = config.hub
         self.buttons = Buttons(self.hub)
 
-        self.pages = pages
+        self.pages = [[self.register(entry) for entry in page] for page in pages]
         self.pageNames = pageName
 
         self.numPages = len(self.pages)
@@ -37,6 +36,12 @@ class menu:
 
         self.bluetooth_pressed = False
         self.last_time_help = 0
+        self._quitFlag = False
+
+        self._lastDrawn = (-1, -1) # (page, index) currently shown on the display
+
+        # Keyboard shortcuts: '=' next page, '-' previous page, enter runs
+        self._keymap = {61: self._pageFwd, 45: self._pageBack, 10: self.run}
 
         self.buttons.update()
 
@@ -50,27 +55,20 @@ class menu:
 
         # Handles keyboard input
         if (self.keyboard.poll(0)):
-            usys.stdin.read(1)  # type: ignore
-            char = usys.stdin.read(1)  # type: ignore
-            if (ord(char) in range(49, 58)):
-                self.index = ord(char) - 49
-            elif (ord(char) == 61):
-                self.page += 1
-                self.index = 0
-            elif (ord(char) == 45):
-                self.page -= 1
-                self.index = 0
-            elif (ord(char) == 10):
-                self.run()
+            # Drain everything waiting and only act on the latest key
+            while self.keyboard.poll(0):
+                char = usys.stdin.read(1)  # type: ignore
+            c = ord(char)
+            if 49 <= c <= 57: # Digits 1 - 9
+                self.index = c - 49
+            elif c in self._keymap:
+                self._keymap[c]()
 
             self.wrapIdx()
-
-            self.hub.display.off()
             self.display()
 
         # Check if one button is pressed on the robot
         if self.buttons.one_pressed():
-            self.hub.display.off()
             self.hub.speaker.beep(500, 50)
 
         if self.buttons.pressed(Button.BLUETOOTH):
@@ -82,19 +80,16 @@ class menu:
         elif self.buttons.held(Button.BLUETOOTH):
             self.bluetooth_pressed = False
             self.printInfo()
-            self.hub.display.off()
-            self.display()
+            self.redraw()
             self.buttons.time_buttons[Button.BLUETOOTH].reset()
             return
         elif self.buttons.double_pressed(Button.BLUETOOTH):
             raise KeyboardInterrupt
         elif self.bluetooth_pressed and self.buttons.last_press(Button.BLUETOOTH) > 250:
-            self.page += 1
-            self.index = 0
+            self._pageFwd()
             self.bluetooth_pressed = False
 
             self.wrapIdx()
-            self.hub.display.off()
             self.display()
 
         elif self.buttons.pressed(Button.CENTER):
@@ -108,9 +103,28 @@ class menu:
         """
         Displays the dots on the screen in accord to currently selected run
         """
-        for i in range(0, self.index+1):
-            self.hub.display.pixel(
-                self.page*2 + umath.floor(i / 5), i % 5, 100)
+        lastPage, lastIndex = self._lastDrawn
+        if lastPage == self.page and lastIndex == self.index:
+            return
+
+        if lastPage == self.page and lastIndex < self.index:
+            start = lastIndex + 1 # Only light the newly selected pixels
+        else:
+            self.hub.display.off()
+            start = 0
+
+        for i in range(start, self.index+1):
+            col, row = divmod(i, 5)
+            self.hub.display.pixel(self.page*2 + col, row, 100)
+
+        self._lastDrawn = (self.page, self.index)
+
+    def redraw(self):
+        """
+        Forces a full redraw, used after something else has written to the display
+        """
+        self._lastDrawn = (-1, -1)
+        self.display()
 
     def run(self):
         """
@@ -120,10 +134,31 @@ class menu:
 
         self.execute() # Handles generator / normal function
         self.config.stop() # Stops all motors once completed
+        self._quitFlag = False # Don't carry a cancel into the next run
+        self._lastDrawn = (-1, -1) # Run may have written to the display
 
         self.index += 1 # Moves to next run
         self.config.hub.light.on(Color.WHITE) # Changes back to white when idle
 
+    def register(self, entry):
+        """
+        Converts a page entry into a list of tagged Tasks
+
+        Bare callables become Task.CALL and nested lists become Task.PARALLEL
+        of Task.GEN items
+        """
+        if isinstance(entry, list):
+            return [self._tag(item) for item in entry]
+        return [self._tag(entry)]
+
+    def _tag(self, item):
+        if isinstance(item, Task):
+            return item
+        if isinstance(item, list):
+            return Task(Task.PARALLEL, [i if isinstance(i, Task) else Task(Task.GEN, i)
+                                        for i in item])
+        return Task(Task.CALL, item)
+
     def execute(self):
         """
         Runs should be in format of:
@@ -135,35 +170,47 @@ class menu:
 
         Items in menu can also be singular e.g:
         action1()
-        """
 
-        try:
-            for item in self.pages[self.page][self.index]:
-                if callable(item):
-                    try:
-                        temp = item()
-                        if isGen(temp):
-                            while next(temp):
-                                if self.quit(): return
-                    except TypeError:
-                        item(self.config)
-                else:
-                    count = len(item)
-                    item = [i() for i in item]
-                    while count != 0:
-                        for i in range(len(item) - 1, -1, -1):
-                            if self.quit(): return
-                            if not next(item[i]):
-                                count -= 1
-                                del item[i]
-        except TypeError:
-            try:
-                temp = self.pages[self.page][self.index]()
-                if isGen(temp):
-                    while next(temp):
-                        if self.quit(): return
-            except TypeError:
-                self.pages[self.page][self.index](self.config)
+        Movements come from @coroutine and are run as generators, any other
+        callable is called with the config. Wrap other entries with the
+        helpers from other.py:
+            gen(fn, *args) - fn is a generator function, stepped like a movement
+            func(fn, *args) - fn is called without the config
+        """
+
+        for task in self.pages[self.page][self.index]:
+            kind = task.kind
+            if kind == Task.GEN:
+                gen = task.start()
+                while next(gen):
+                    self._pollQuit()
+                    if self.quit(): return
+            elif kind == Task.CALL:
+                if hasattr(task.fn(self.config), 'send'):
+                    # Entries used to be probed with fn() first, generator functions now need tagging
+                    raise TypeError("menu entry returned a generator, wrap it with gen() from other.py")
+            elif kind == Task.FUNC:
+                task.start()
+            else:
+                item = [i.start() for i in task.fn]
+                while item:
+                    self._pollQuit() # One button read shared by every task this pass
+                    if self.quit(): return
+                    i = len(item) - 1
+                    while i >= 0:
+                        if not next(item[i]):
+                            # Swap finished task with the last one instead of shifting the list
+                            item[i] = item[-1]
+                            item.pop()
+                        i -= 1
+
+    def _pageFwd(self):
+        self.page += 1
+        self.index = 0
+
+    def _pageBack(self):
+        self.page -= 1
+        self.index = 0
 
     def wrapIdx(self):
         """
@@ -193,10 +240,14 @@ class menu:
         while True:
             self.update()
     
+    def _pollQuit(self):
+        """
+        Reads the hub buttons once and updates the quit flag
+        """
+        self._quitFlag = Button.BLUETOOTH in self.hub.buttons.pressed()
+
     def quit(self):
         """
-        Condition for when a run is quit
+        Condition for when a run is quit, as of the last button read
         """
-        if Button.BLUETOOTH in self.hub.buttons.pressed():
-            return True
-        return False
+        return self._quitFlag
@@ -1,11 +1,29 @@
-# Dummy generator to compare object to a generator
-def _gen():
-    yield
-_gentype = type(_gen())
+# Menu entry tagged with how the menu should execute it
+class Task():
+    GEN = 0       # Generator function and its arguments, e.g. a @coroutine movement
+    CALL = 1      # Plain function called with the config
+    PARALLEL = 2  # List of GEN tasks run together
+    FUNC = 3      # Plain function called with its own arguments, no config
 
-# Checks whether an object is a generator
-def isGen(obj):
-    return type(obj) == _gentype
+    def __init__(self, kind, fn, args=(), kwargs=None):
+        self.kind = kind
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs or {}
+
+    def start(self):
+        """
+        Calls the stored function, giving a fresh generator for a GEN task
+        """
+        return self.fn(*self.args, **self.kwargs)
+
+# Tags a generator function (e.g. one that isn't a @coroutine) as a menu entry
+def gen(fn, *args, **kwargs):
+    return Task(Task.GEN, fn, args, kwargs)
+
+# Tags a function that doesn't take the config as a menu entry
+def func(fn, *args, **kwargs):
+    return Task(Task.FUNC, fn, args, kwargs)
 
 class movementDec():
     def __init__(self):
@@ -14,10 +32,11 @@ class movementDec():
     def coroutine(self, func):
         def wrapper(*args, **kwargs):
             if self.REPL:
-                for i in func(*args, **kwargs)():
+                for i in func(*args, **kwargs):
                     pass
             else:
-                return func(*args, **kwargs)
+                # Store the call so the menu can restart the movement on every run
+                return Task(Task.GEN, func, args, kwargs)
         return wrapper
 
 m_movementDec = movementDec()